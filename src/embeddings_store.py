@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+
+def _sidecar_path(npy_path: str) -> str:
+    """Path of the metadata file stored next to an embeddings .npy file."""
+    return os.path.splitext(npy_path)[0] + ".meta.json"
+
+
+def _write_sidecar(
+    npy_path: str,
+    matrix: np.ndarray,
+    ids: List[str],
+    metadatas: List[Dict[str, Any]],
+) -> None:
+    """Check that ids/metadata line up with the matrix and write the sidecar."""
+    if not ids and not metadatas and matrix.size == 0:
+        raise ValueError(f"No embeddings to save to {npy_path}.")
+
+    if matrix.ndim != 2 or len(matrix) != len(ids) or len(ids) != len(metadatas):
+        raise ValueError(
+            f"Expected {len(ids)} ids/metadatas aligned with a 2-D embedding "
+            f"matrix, got shape {matrix.shape} and {len(metadatas)} metadatas."
+        )
+
+    os.makedirs(os.path.dirname(npy_path) or ".", exist_ok=True)
+    with open(_sidecar_path(npy_path), "w", encoding="utf-8") as f:
+        json.dump({"count": len(ids), "ids": ids, "metadatas": metadatas}, f)
+
+
+def save_embeddings(
+    npy_path: str,
+    embeddings: List[List[float]],
+    ids: List[str],
+    metadatas: List[Dict[str, Any]],
+) -> str:
+    """
+    Save embeddings as a float32 .npy matrix with a JSON metadata sidecar.
+
+    Args:
+        npy_path (str): Destination of the [N, D] embeddings matrix.
+        embeddings (List[List[float]]): One vector per entry.
+        ids (List[str]): Entry IDs, aligned with `embeddings`.
+        metadatas (List[Dict[str, Any]]): Entry metadata, aligned with `embeddings`.
+
+    Returns:
+        str: The path of the saved .npy file.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    _write_sidecar(npy_path, matrix, ids, metadatas)
+    np.save(npy_path, matrix)
+    return npy_path
+
+
+def load_embeddings(npy_path: str) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+    """
+    Load embeddings saved by `save_embeddings`.
+
+    The matrix is memory-mapped read-only, so loading is near-instant and
+    pages are only read from disk when used. Cosine similarity against
+    normalized vectors is then a single `matrix @ query`.
+
+    Args:
+        npy_path (str): Path of the embeddings .npy file.
+
+    Returns:
+        Tuple[np.ndarray, List[str], List[Dict[str, Any]]]: The [N, D] float32
+            matrix, the entry IDs and the entry metadata.
+    """
+    matrix = np.load(npy_path, mmap_mode="r")
+
+    with open(_sidecar_path(npy_path), "r", encoding="utf-8") as f:
+        sidecar = json.load(f)
+
+    return matrix, sidecar["ids"], sidecar["metadatas"]
+
+
+def convert_embeddings_json(json_path: str) -> str:
+    """
+    Convert a JSON embeddings file ({"count", "items": [{"id", "embedding",
+    "metadata"}]}) into the .npy + sidecar format, next to the original.
+
+    Args:
+        json_path (str): Path of the JSON embeddings file.
+
+    Returns:
+        str: The path of the written .npy file.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    ids, embeddings, metadatas = [], [], []
+    for item in data.get("items", []):
+        embedding = item.get("embedding", [])
+        # some files store each vector wrapped in an extra list
+        if embedding and isinstance(embedding[0], list):
+            embedding = embedding[0]
+        if not embedding:
+            print(f"⚠️ Skipping item {item.get('id')} without an embedding")
+            continue
+
+        ids.append(str(item["id"]))
+        embeddings.append(embedding)
+        metadatas.append(item.get("metadata", {}))
+
+    npy_path = os.path.splitext(json_path)[0] + ".npy"
+    save_embeddings(npy_path, embeddings, ids, metadatas)
+    print(f"✅ Converted {len(ids)} embeddings: {json_path} -> {npy_path}")
+    return npy_path
+
+
+if __name__ == "__main__":
+    # One-time migration: python src/embeddings_store.py <file.json> [...]
+    if len(sys.argv) < 2:
+        print("Usage: python src/embeddings_store.py <embeddings.json> [...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        convert_embeddings_json(path)
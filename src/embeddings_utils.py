@@ -1,8 +1,19 @@
 import os
+import json
 import base64
-import requests
-from typing import List
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import cohere
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
 from dotenv import load_dotenv
 
 # load environment variables (for COHERE_API_KEY)
@@ -15,49 +26,370 @@ if not COHERE_API_KEY:
         "❌ COHERE_API_KEY not found. Please add it to your .env file."
     )
 
-co = cohere.ClientV2(api_key=COHERE_API_KEY)
+# shared connection pool, so repeated embed calls and image downloads
+# reuse open TCP/TLS connections instead of reconnecting every time
+_http = httpx.Client(
+    limits=httpx.Limits(
+        max_keepalive_connections=20,
+        max_connections=100,
+        keepalive_expiry=30.0,
+    ),
+    follow_redirects=True,
+)
 
+# keep cohere's own 300s request timeout (httpx would otherwise default to 5s)
+co = cohere.ClientV2(api_key=COHERE_API_KEY, timeout=300, httpx_client=_http)
 
-def cohere_generate_image_embedding(image_path: str) -> List[float]:
+
+# per-request timeout for embed calls, shorter than the client's 300s default
+# so a stuck request fails fast enough to be retried
+EMBED_TIMEOUT_SECONDS = 60
+
+# retry transient network/rate-limit failures with jittered exponential
+# backoff instead of dropping the image on the first error; stop after 5
+# attempts or once 3 minutes have passed, whichever comes first
+_retry_transient = retry(
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(5) | stop_after_delay(180),
+    retry=retry_if_exception_type((
+        httpx.TransportError,
+        cohere.TooManyRequestsError,
+        cohere.ServiceUnavailableError,
+        cohere.GatewayTimeoutError,
+        cohere.InternalServerError,
+    )),
+    reraise=True,
+)
+
+# data URI header for the common case, built once instead of per image
+_JPEG_PREFIX = b"data:image/jpeg;base64,"
+
+# Cohere rejects the whole embed request if any image is not JPEG/PNG or
+# is larger than 5MB, so such images are filtered out before batching
+_SUPPORTED_MIMES = ("image/jpeg", "image/png")
+_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+
+def _read_local_image(image_path: str) -> bytes:
+    """Read a local image file into memory."""
+    with open(image_path, "rb") as f:
+        return f.read()
+
+
+def _to_data_uri(img_bytes: bytes, mime: str = "image/jpeg") -> str:
+    """Encode raw image bytes as a base64 data URI accepted by Cohere."""
+    mime = mime.split(";")[0].strip().lower()
+    if mime not in _SUPPORTED_MIMES:
+        raise ValueError(f"Unsupported image type '{mime}' (expected JPEG or PNG).")
+    if len(img_bytes) > _MAX_IMAGE_BYTES:
+        raise ValueError(f"Image is {len(img_bytes)} bytes, over Cohere's 5MB limit.")
+
+    if mime == "image/jpeg":
+        prefix = _JPEG_PREFIX
+    else:
+        prefix = b"data:" + mime.encode("ascii") + b";base64,"
+
+    return (prefix + base64.b64encode(img_bytes)).decode("ascii")
+
+
+@_retry_transient
+def _load_image_data_uri(image_path: str) -> str:
     """
-    Generate a float embedding for an image via Cohere's embed-v4.0 model.
+    Read an image from a URL or local path and encode it as a base64 data URI.
 
     Args:
         image_path (str): URL or local path to the image.
 
     Returns:
-        List[float]: The embedding vector.
+        str: The image as a data URI accepted by Cohere's embed endpoint.
     """
+    # handle both remote URLs and local paths
+    if image_path.startswith(("http://", "https://")):
+        resp = _http.get(image_path, timeout=10)
+        resp.raise_for_status()
+        return _to_data_uri(resp.content, resp.headers.get("Content-Type", "image/jpeg"))
+
+    return _to_data_uri(_read_local_image(image_path))
+
+
+@_retry_transient
+async def _fetch_bytes(session: httpx.AsyncClient, url: str) -> Tuple[bytes, str]:
+    """
+    Download an image without blocking the event loop.
+
+    Args:
+        session (httpx.AsyncClient): Shared async client for the batch.
+        url (str): Remote image URL.
+
+    Returns:
+        Tuple[bytes, str]: The image bytes and its mime type.
+    """
+    resp = await session.get(url, timeout=10)
+    resp.raise_for_status()
+    return resp.content, resp.headers.get("Content-Type", "image/jpeg")
+
+
+async def _load_image_data_uri_async(
+    session: httpx.AsyncClient, image_path: str, semaphore: asyncio.Semaphore
+) -> Optional[str]:
+    """Async counterpart of `_load_image_data_uri`; returns None on failure."""
     try:
-        # handle both remote URLs and local paths
-        if image_path.startswith(("http://", "https://")):
-            resp = requests.get(image_path, timeout=10)
-            resp.raise_for_status()
-            img_bytes = resp.content
-            mime = resp.headers.get("Content-Type", "image/jpeg")
-        else:
-            with open(image_path, "rb") as f:
-                img_bytes = f.read()
-            mime = "image/jpeg"
-
-        # convert image to data URI (base64)
-        data_uri = f"data:{mime};base64,{base64.b64encode(img_bytes).decode()}"
-
-        # request embedding from Cohere
-        resp = co.embed(
-            model="embed-v4.0",
-            input_type="image",
-            embedding_types=["float"],
-            images=[data_uri],
+        async with semaphore:
+            if image_path.startswith(("http://", "https://")):
+                img_bytes, mime = await _fetch_bytes(session, image_path)
+                return _to_data_uri(img_bytes, mime)
+
+            # file reads would block the loop, so run them in a worker thread
+            img_bytes = await asyncio.to_thread(_read_local_image, image_path)
+            return _to_data_uri(img_bytes)
+    except Exception as e:
+        print(f"❌ Error loading image {image_path}: {e}")
+        return None
+
+
+@_retry_transient
+def _embed_data_uris(data_uris: List[str]) -> List[List[float]]:
+    """
+    Embed up to 96 image data URIs with a single Cohere request.
+
+    Args:
+        data_uris (List[str]): Base64 data URIs of the images.
+
+    Returns:
+        List[List[float]]: One embedding per data URI, in the same order.
+    """
+    # `images` only accepts a single image per call, `inputs` takes up to 96
+    resp = co.embed(
+        model="embed-v4.0",
+        input_type="image",
+        embedding_types=["float"],
+        inputs=[
+            {"content": [{"type": "image_url", "image_url": {"url": uri}}]}
+            for uri in data_uris
+        ],
+        request_options={"timeout_in_seconds": EMBED_TIMEOUT_SECONDS},
+    )
+
+    # extract embeddings
+    embeddings = getattr(resp.embeddings, "float", None) or []
+    if len(embeddings) != len(data_uris):
+        raise ValueError(
+            f"Expected {len(data_uris)} float embeddings from Cohere API, "
+            f"got {len(embeddings)}."
         )
+    return embeddings
+
 
-        # extract embeddings
-        embeddings = getattr(resp.embeddings, "float", [])
-        if not embeddings:
-            raise ValueError("No float embeddings returned from Cohere API.")
+def _embed_isolating_rejects(data_uris: List[str]) -> List[List[float]]:
+    """
+    Embed data URIs in one request, splitting it when Cohere rejects it.
 
-        return embeddings[0] if isinstance(embeddings[0], list) else embeddings
+    A 4xx rejection of a batch is caused by one or more bad images, so the
+    batch is halved until the offending images are isolated. Only those get
+    an empty embedding; the rest of the batch is still embedded.
 
+    Args:
+        data_uris (List[str]): Base64 data URIs of the images.
+
+    Returns:
+        List[List[float]]: One embedding per data URI, empty list if rejected.
+    """
+    try:
+        return _embed_data_uris(data_uris)
+    except (cohere.BadRequestError, cohere.UnprocessableEntityError) as e:
+        if len(data_uris) == 1:
+            print(f"❌ Cohere rejected image: {e}")
+            return [[]]
+
+        mid = len(data_uris) // 2
+        return _embed_isolating_rejects(data_uris[:mid]) + _embed_isolating_rejects(data_uris[mid:])
+
+
+def _embed_chunk(data_uris: List[Optional[str]]) -> List[List[float]]:
+    """
+    Embed one chunk of loaded images, leaving failed loads empty.
+
+    Args:
+        data_uris (List[Optional[str]]): Data URIs, None where loading failed.
+
+    Returns:
+        List[List[float]]: One embedding per entry, empty list on failure.
+    """
+    embeddings: List[List[float]] = [[] for _ in data_uris]
+    loaded = [(i, uri) for i, uri in enumerate(data_uris) if uri is not None]
+    if not loaded:
+        return embeddings
+
+    try:
+        chunk_embeddings = _embed_isolating_rejects([uri for _, uri in loaded])
+        for (i, _), embedding in zip(loaded, chunk_embeddings):
+            embeddings[i] = embedding
     except Exception as e:
-        print(f"❌ Error generating image embedding: {e}")
-        return []
\ No newline at end of file
+        print(f"❌ Error generating image embeddings: {e}")
+
+    return embeddings
+
+
+def _try_load_image_data_uri(image_path: str) -> Optional[str]:
+    """`_load_image_data_uri` that reports errors and returns None instead of raising."""
+    try:
+        return _load_image_data_uri(image_path)
+    except Exception as e:
+        print(f"❌ Error loading image {image_path}: {e}")
+        return None
+
+
+def _record_failures(
+    failed_log_path: Optional[str], image_paths: List[str], embeddings: List[List[float]]
+) -> None:
+    """
+    Append images that could not be embedded to a JSONL dead-letter file.
+
+    Args:
+        failed_log_path (Optional[str]): JSONL file to append to (skipped if None).
+        image_paths (List[str]): Paths of one chunk.
+        embeddings (List[List[float]]): Embeddings of that chunk, empty on failure.
+    """
+    failed = [path for path, embedding in zip(image_paths, embeddings) if not embedding]
+    if not failed_log_path or not failed:
+        return
+
+    timestamp = datetime.now().isoformat()
+    with open(failed_log_path, "a", encoding="utf-8") as f:
+        for path in failed:
+            f.write(json.dumps({"image_path": path, "timestamp": timestamp}) + "\n")
+
+
+def _embed_paths(
+    image_paths: List[str],
+    batch_size: int,
+    failed_log_path: Optional[str],
+    load_chunk: Callable[[List[str]], List[Optional[str]]],
+) -> List[List[float]]:
+    """
+    Shared driver for the batch embedding functions.
+
+    Each distinct path is embedded once, in chunks of `batch_size`, and the
+    result is fanned out to every position where the path appears. Only one
+    chunk of encoded images is held in memory at a time.
+
+    Args:
+        image_paths (List[str]): URLs or local paths to the images.
+        batch_size (int): Number of images per embed request.
+        failed_log_path (Optional[str]): Dead-letter JSONL file (see `_record_failures`).
+        load_chunk (Callable): Loads a chunk of paths into data URIs (None on failure).
+
+    Returns:
+        List[List[float]]: One embedding per input path, in the same order.
+    """
+    # embed each distinct image once and fan the result out to duplicates
+    unique_paths = list(dict.fromkeys(image_paths))
+    by_path: Dict[str, List[float]] = {}
+
+    for start in range(0, len(unique_paths), batch_size):
+        chunk_paths = unique_paths[start:start + batch_size]
+        chunk_embeddings = _embed_chunk(load_chunk(chunk_paths))
+        _record_failures(failed_log_path, chunk_paths, chunk_embeddings)
+        by_path.update(zip(chunk_paths, chunk_embeddings))
+
+    return [list(by_path[path]) for path in image_paths]
+
+
+def cohere_generate_image_embeddings(
+    image_paths: List[str], batch_size: int = 96, failed_log_path: Optional[str] = None
+) -> List[List[float]]:
+    """
+    Generate float embeddings for many images via Cohere's embed-v4.0 model.
+
+    Images are downloaded/read in parallel and sent in batches of up to
+    `batch_size` per request (96 is Cohere's per-call maximum), instead of
+    one request per image. Only one batch of encoded images is held in
+    memory at a time. Duplicate paths are only loaded and embedded once.
+    Transient network and rate-limit errors are retried with exponential
+    backoff.
+
+    Args:
+        image_paths (List[str]): URLs or local paths to the images.
+        batch_size (int): Number of images per embed request.
+        failed_log_path (Optional[str]): JSONL file where images that still
+            fail after retrying are appended, for later reprocessing.
+
+    Returns:
+        List[List[float]]: One embedding per input path, in the same order.
+            Images that could not be loaded or embedded get an empty list.
+    """
+    # fetching images is I/O bound, so threads overlap the downloads
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return _embed_paths(
+            image_paths,
+            batch_size,
+            failed_log_path,
+            lambda chunk_paths: list(pool.map(_try_load_image_data_uri, chunk_paths)),
+        )
+
+
+async def cohere_generate_image_embeddings_async(
+    image_paths: List[str],
+    batch_size: int = 96,
+    max_concurrency: int = 32,
+    failed_log_path: Optional[str] = None,
+    session: Optional[httpx.AsyncClient] = None,
+) -> List[List[float]]:
+    """
+    Async variant of `cohere_generate_image_embeddings`.
+
+    Downloads run concurrently on the caller's event loop, capped at
+    `max_concurrency` in flight, while the embed requests and dead-letter
+    writes run in a worker thread so they never block the loop. Pass a
+    long-lived `session` to keep connections alive across calls; otherwise
+    a client is created for this call only.
+
+    Args:
+        image_paths (List[str]): URLs or local paths to the images.
+        batch_size (int): Number of images per embed request.
+        max_concurrency (int): Maximum number of images loaded at once.
+        failed_log_path (Optional[str]): JSONL file where images that still
+            fail after retrying are appended, for later reprocessing.
+        session (Optional[httpx.AsyncClient]): Client used for downloads.
+
+    Returns:
+        List[List[float]]: One embedding per input path, in the same order.
+            Images that could not be loaded or embedded get an empty list.
+    """
+    if session is None:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=32)
+        async with httpx.AsyncClient(limits=limits, follow_redirects=True) as own_session:
+            return await cohere_generate_image_embeddings_async(
+                image_paths, batch_size, max_concurrency, failed_log_path, own_session
+            )
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def load_chunk(chunk_paths: List[str]) -> List[Optional[str]]:
+        return list(await asyncio.gather(
+            *(_load_image_data_uri_async(session, path, semaphore) for path in chunk_paths)
+        ))
+
+    # the driver runs in a worker thread and hands each chunk's downloads
+    # back to the event loop, waiting for them before embedding the chunk
+    def load_chunk_from_thread(chunk_paths: List[str]) -> List[Optional[str]]:
+        return asyncio.run_coroutine_threadsafe(load_chunk(chunk_paths), loop).result()
+
+    return await asyncio.to_thread(
+        _embed_paths, image_paths, batch_size, failed_log_path, load_chunk_from_thread
+    )
+
+
+def cohere_generate_image_embedding(image_path: str) -> List[float]:
+    """
+    Generate a float embedding for an image via Cohere's embed-v4.0 model.
+
+    Args:
+        image_path (str): URL or local path to the image.
+
+    Returns:
+        List[float]: The embedding vector.
+    """
+    # single image: skip the batch path's thread pool and dedup bookkeeping
+    return _embed_chunk([_try_load_image_data_uri(image_path)])[0]
@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any, List, Optional, cast
+from typing import Dict, Any, Iterator, List, Optional, Tuple, cast
 from datetime import datetime
 import numpy as np
 import chromadb
@@ -303,6 +303,44 @@ class SimpleVectorDB:
         except Exception as e:
             return {"total_images": 0, "collection_name": "Error", "error": str(e)}
     
+    def iter_collection(
+        self,
+        chunk_size: int = 1024,
+        collection_name: Optional[str] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Iterate over all entries of a collection in fixed-size pages
+        
+        Unlike calling collection.get() with no limit, only one page of IDs and
+        metadata is held in memory at a time.
+        
+        Args:
+            chunk_size: Number of entries to fetch per request
+            collection_name: Optional collection name (uses current if None)
+            
+        Yields:
+            (id, metadata) pairs
+        """
+        # Use specified collection or current collection
+        if collection_name:
+            collection = self.create_collection(collection_name)
+        elif self.current_collection:
+            collection = self.current_collection
+        else:
+            raise ValueError("No active collection. Please call use_collection() first.")
+        
+        offset = 0
+        while True:
+            page = collection.get(limit=chunk_size, offset=offset, include=["metadatas"])
+            ids = page["ids"]
+            if not ids:
+                break
+            
+            metadatas = page.get("metadatas") or [{} for _ in ids]
+            yield from zip(ids, cast(List[Dict[str, Any]], metadatas))
+            
+            offset += len(ids)
+    
     def verify_persistence(self) -> Dict[str, Any]:
         """
         Verify that data is properly persisted to disk